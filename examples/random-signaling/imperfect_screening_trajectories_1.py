@@ -15,8 +15,9 @@ params = {'dA': 0.5, 'da': 0.5, 'eA': 1 - eps, 'ea': 1 - eps,
 N = 500
 prng = np.random.RandomState(42)
 initial_males = prng.dirichlet(np.ones(4), size=N)
-initial_females = initial_males
-initial_guesses = np.hstack((initial_males, initial_females))
+initial_guesses = np.empty((N, 8))
+initial_guesses[:, :4] = initial_males
+initial_guesses[:, 4:] = initial_males
 
 # create an instance of the model
 example = model.Model(params=params,
@@ -26,9 +27,8 @@ fig, axes = plt.subplots(1, 2, figsize=(12, 8))
 
 for i in range(N):
 
-    # extract initial guess
-    example.initial_guess = initial_guesses[i]
-    tmp_traj = example.simulate(initial_condition=example.initial_guess, T=500)
+    # simulate starting from the i-th initial guess (a view, not a copy)
+    tmp_traj = example.simulate(initial_condition=initial_guesses[i], T=500)
 
     # male allele trajectories
     m_GA, = axes[0].plot(tmp_traj[0], color='b', alpha=0.05)
@@ -12,8 +12,9 @@ params = {'dA':1.0, 'da':0.5, 'eA':0.0, 'ea':1.0, 'PiaA':6.0, 'PiAA':5.0,
 N = 100
 prng = np.random.RandomState(42)
 initial_males = prng.dirichlet(np.ones(4), size=N)
-initial_females = initial_males
-initial_guesses = np.hstack((initial_males, initial_females)) 
+initial_guesses = np.empty((N, 8))
+initial_guesses[:, :4] = initial_males
+initial_guesses[:, 4:] = initial_males
 
 # create an instance of the model
 example = model.StandardModel(params=params,
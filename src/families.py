@@ -8,6 +8,8 @@ import numpy as np
 import pandas as pd
 import sympy as sym
 
+import kernels
+
 # number of female children of particular genotype
 girls = sym.DeferredVector('f')
 
@@ -25,6 +27,8 @@ fecundity_factor = sym.var('c')
 class Family(object):
     """Class representing a family unit."""
 
+    __param_names = None
+
     _modules = [{'ImmutableMatrix': np.array}, "numpy"]
 
     def __init__(self, params, SGA, Sga):
@@ -61,20 +65,38 @@ class Family(object):
         return girls[0] + girls[2]
 
     @property
-    def _numeric_jacobian(self):
+    def _compiled_jacobian(self):
         """
-        Vectorized function for numerically evaluating the Jacobian matrix of
+        Compiled kernels for numerically evaluating the Jacobian matrix of
         partial derivatives.
 
-        :getter: Return the current function.
-        :type: function.
+        :getter: Return the current pair of (scalar, batch) kernels.
+        :type: tuple
+
+        """
+        if self.__compiled_jacobian is None:
+            self.__compiled_jacobian = kernels.compile_kernel([self._symbolic_jacobian],
+                                                              self._symbolic_vars,
+                                                              self._symbolic_params,
+                                                              'jacobian')
+        return self.__compiled_jacobian
+
+    @property
+    def _compiled_system(self):
+        """
+        Compiled kernels for numerically evaluating the system of recurrence
+        relations.
+
+        :getter: Return the current pair of (scalar, batch) kernels.
+        :type: tuple
 
         """
-        if self.__numeric_jacobian is None:
-            self.__numeric_jacobian = sym.lambdify(self._symbolic_args,
-                                                   self._symbolic_jacobian,
-                                                   self._modules)
-        return self.__numeric_jacobian
+        if self.__compiled_system is None:
+            self.__compiled_system = kernels.compile_kernel([self._symbolic_system],
+                                                            self._symbolic_vars,
+                                                            self._symbolic_params,
+                                                            'system')
+        return self.__compiled_system
 
     @property
     def _numeric_size(self):
@@ -88,35 +110,52 @@ class Family(object):
         if self.__numeric_size is None:
             self.__numeric_size = sym.lambdify(self._symbolic_args,
                                                self._symbolic_size,
-                                               self._modules)
+                                               self._modules, cse=True)
         return self.__numeric_size
 
     @property
-    def _numeric_system(self):
+    def _selfish_girls(self):
         """
-        Vectorized function for numerically evaluating the system of recurrence
-        relations.
+        Number of female children carrying the `a` allele of the alpha gene.
 
-        :getter: Return the current function.
-        :type: function.
+        :getter: Return number of female children carrying the `a` allele
+        :type: sympy.Symbol
 
         """
-        if self.__numeric_system is None:
-            self.__numeric_system = sym.lambdify(self._symbolic_args,
-                                                 self._symbolic_system,
-                                                 self._modules)
-        return self.__numeric_system
+        return girls[1] + girls[3]
 
     @property
-    def _selfish_girls(self):
+    def _param_names(self):
         """
-        Number of female children carrying the `a` allele of the alpha gene.
+        Names of the model parameters in the order expected by the compiled
+        kernels.
 
-        :getter: Return number of female children carrying the `a` allele
-        :type: sympy.Symbol
+        :getter: Return the current tuple of parameter names.
+        :type: tuple
 
         """
-        return girls[1] + girls[3]
+        return self.__param_names
+
+    @property
+    def _param_values(self):
+        """
+        Array of parameter values ordered consistently with `_symbolic_params`.
+
+        :getter: Return the current array of parameter values.
+        :type: numpy.ndarray
+
+        Notes
+        -----
+        This is accessed every time the compiled kernels are evaluated, so the
+        array is cached and only rebuilt when the parameter values change
+        (including in-place changes to the `params` dictionary).
+
+        """
+        values = tuple([self.params[name] for name in self._param_names])
+        if values != self.__param_key:
+            self.__param_key = values
+            self.__param_values = np.array(values, dtype=float)
+        return self.__param_values
 
     @property
     def _symbolic_args(self):
@@ -127,7 +166,7 @@ class Family(object):
         :type: list
 
         """
-        return [men, girls] + sym.var(list(self.params.keys()))
+        return [men, girls] + sym.var(list(self._param_names))
 
     @property
     def _symbolic_jacobian(self):
@@ -141,6 +180,17 @@ class Family(object):
         """
         return self._symbolic_system.jacobian(self._symbolic_vars)
 
+    @property
+    def _symbolic_params(self):
+        """
+        List of symbolic model parameters.
+
+        :getter: Return list of symbolic model parameters.
+        :type: list
+
+        """
+        return sym.symbols(list(self._param_names))
+
     @property
     def _symbolic_size(self):
         """
@@ -206,7 +256,7 @@ class Family(object):
     def female_genotypes(self, genotypes):
         """Set new indices for female genotypes."""
         self._female_genotypes = self._validate_female_genotypes(genotypes)
-        self._clear_cache()
+        self.__numeric_size = None
 
     @property
     def male_genotype(self):
@@ -224,7 +274,7 @@ class Family(object):
     def male_genotype(self, genotype):
         """Set a new index for the male genotype."""
         self._male_genotype = self._validate_genotype(genotype)
-        self._clear_cache()
+        self.__numeric_size = None
 
     @property
     def params(self):
@@ -268,6 +318,13 @@ class Family(object):
     def params(self, value):
         """Set a new dictionary of model parameters."""
         self._params = self._validate_params(value)
+        self.__param_key = None
+
+        # compiled kernels take the parameters in a fixed order
+        param_names = tuple(sorted(self._params.keys()))
+        if param_names != self.__param_names:
+            self.__param_names = param_names
+            self._clear_cache()
 
     @property
     def SGA(self):
@@ -337,9 +394,9 @@ class Family(object):
 
     def _clear_cache(self):
         """Clear all cached values."""
-        self.__numeric_jacobian = None
+        self.__compiled_jacobian = None
+        self.__compiled_system = None
         self.__numeric_size = None
-        self.__numeric_system = None
 
     def _family_unit(self, male_genotype, *female_genotypes):
         raise NotImplementedError
@@ -820,9 +877,34 @@ class Family(object):
             Size of the family unit period t+1.
 
         """
-        size = self._numeric_size(X[:4], X[4:], *self.params.values())
+        size = self._numeric_size(X[:4], X[4:], **self.params)
         return size
 
+    def compute_size_batch(self, trajectory, male_genotype, female_genotypes):
+        """
+        Family size for a given configuration of genotypes along a trajectory.
+
+        Parameters
+        ----------
+        trajectory : numpy.ndarray (shape=(8, T))
+            Array of values for adult males in period t+1 and female children
+            in period t for each of T periods.
+        male_genotype : int
+            Integer index of a valid genotype for the male.
+        female_genotypes : tuple
+            Integer indices of valid genotypes for the females.
+
+        Returns
+        -------
+        size = numpy.ndarray (shape=(T,))
+            Size of the family unit in each period.
+
+        """
+        self.male_genotype = male_genotype
+        self.female_genotypes = female_genotypes
+        size = self.compute_size(trajectory)
+        return np.broadcast_to(size, trajectory.shape[1:])
+
 
 class OneMaleTwoFemales(Family):
 
@@ -0,0 +1,168 @@
+"""
+Compile symbolic expressions into fast numerical kernels.
+
+The functions produced by `sympy.lambdify` dispatch each elementary operation
+to NumPy, which is expensive for the small systems of equations used in this
+model. Here we instead emit a flat Python function with explicit common
+sub-expression elimination and, if Numba is installed, JIT compile it.
+
+"""
+import numpy as np
+import sympy as sym
+from sympy.printing.numpy import NumPyPrinter
+
+try:
+    import numba
+    prange = numba.prange
+except ImportError:
+    numba = None
+    prange = range
+
+
+def jit(func=None, **options):
+    """JIT compile a function with Numba (if available)."""
+    if func is None:
+        return lambda f: jit(f, **options)
+    elif numba is None:
+        return func
+    else:
+        return numba.njit(error_model='numpy', **options)(func)
+
+
+def _autowrap_kernel(exprs, variables, params, tempdir):
+    """Compile a kernel evaluating some symbolic matrices into C code."""
+    from sympy.utilities.autowrap import autowrap
+
+    var_syms, param_syms, mapping = _placeholders(variables, params)
+    funcs = [autowrap(sym.Matrix(expr).xreplace(mapping), backend='cython',
+                      args=var_syms + param_syms, tempdir=tempdir)
+             for expr in exprs]
+
+    def kernel(X, p, *outs):
+        args = tuple(X) + tuple(p)
+        for func, out in zip(funcs, outs):
+            out[...] = func(*args).reshape(out.shape)
+
+    def batch_kernel(X, p, *outs):
+        for n in range(X.shape[1]):
+            kernel(X[:, n], p, *[out[..., n] for out in outs])
+
+    return kernel, batch_kernel
+
+
+def _placeholders(variables, params):
+    """Create "safe" placeholder symbols for variables and parameters."""
+    var_syms = sym.symbols('_x0:{}'.format(len(variables)))
+    param_syms = sym.symbols('_p0:{}'.format(len(params)))
+    mapping = dict(zip(variables, var_syms))
+    mapping.update(zip(params, param_syms))
+    return var_syms, param_syms, mapping
+
+
+def _kernel_source(exprs, variables, params, name):
+    """Generate source code for a kernel evaluating some symbolic matrices."""
+    var_syms, param_syms, mapping = _placeholders(variables, params)
+
+    flat_exprs = []
+    for expr in exprs:
+        flat_exprs.extend(sym.Matrix(expr).xreplace(mapping))
+    repl, reduced = sym.cse(flat_exprs, symbols=sym.numbered_symbols('_t'))
+
+    printer = NumPyPrinter()
+    outs = ['out{}'.format(k) for k in range(len(exprs))]
+    lines = ['def {}(X, p, {}):'.format(name, ', '.join(outs))]
+    for i, x in enumerate(var_syms):
+        lines.append('    {} = X[{}]'.format(x, i))
+    for i, x in enumerate(param_syms):
+        lines.append('    {} = p[{}]'.format(x, i))
+    for lhs, rhs in repl:
+        lines.append('    {} = {}'.format(lhs, printer.doprint(rhs)))
+
+    # column (or row) vectors are written into 1D outputs
+    position = 0
+    for out, expr in zip(outs, exprs):
+        rows, cols = sym.Matrix(expr).shape
+        for i in range(rows):
+            for j in range(cols):
+                if rows == 1 or cols == 1:
+                    idx = '{}'.format(i * cols + j)
+                else:
+                    idx = '{}, {}'.format(i, j)
+                rhs = printer.doprint(reduced[position])
+                lines.append('    {}[{}] = {}'.format(out, idx, rhs))
+                position += 1
+
+    # batched version loops over the trailing dimension of the inputs
+    lines.append('')
+    lines.append('')
+    lines.append('def {}_batch(X, p, {}):'.format(name, ', '.join(outs)))
+    lines.append('    for n in range(X.shape[1]):')
+    slices = []
+    for out, expr in zip(outs, exprs):
+        if 1 in sym.Matrix(expr).shape:
+            slices.append('{}[:, n]'.format(out))
+        else:
+            slices.append('{}[:, :, n]'.format(out))
+    lines.append('        {}(X[:, n], p, {})'.format(name, ', '.join(slices)))
+
+    return '\n'.join(lines) + '\n'
+
+
+def compile_kernel(exprs, variables, params, name='kernel', backend='numba',
+                   tempdir=None):
+    """
+    Compile symbolic matrices into a function writing into output arrays.
+
+    Parameters
+    ----------
+    exprs : list
+        List of sympy.Matrix objects to evaluate.
+    variables : list
+        List of symbolic endogenous variables.
+    params : list
+        List of symbolic model parameters.
+    name : str (default='kernel')
+        Name of the generated function.
+    backend : str (default='numba')
+        Either 'numba', in which case the generated Python code is JIT
+        compiled by Numba (or used as is if Numba is not available), or
+        'cython', in which case the expressions are compiled into a C
+        extension using `sympy.utilities.autowrap`.
+    tempdir : str (default=None)
+        Directory for the generated C code when using the 'cython' backend.
+
+    Returns
+    -------
+    kernel : function
+        Function with signature `kernel(X, p, out0, out1, ...)` where `X` is a
+        1D array of endogenous variables, `p` is an array of parameter values
+        (ordered as in `params`) and there is one output array per symbolic
+        matrix. Vector valued matrices are written into 1D outputs; all other
+        matrices are written into 2D outputs.
+    batch_kernel : function
+        Function with the same signature as `kernel` but where `X` has shape
+        (n, N) and each output has an additional trailing dimension of size N.
+
+    Notes
+    -----
+    Kernels compiled with the 'cython' backend are Python callables and thus
+    can not be called from inside other Numba compiled functions.
+
+    """
+    if backend == 'cython':
+        return _autowrap_kernel(exprs, variables, params, tempdir)
+    elif backend != 'numba':
+        mesg = "The backend must be one of 'numba' or 'cython', not {}."
+        raise ValueError(mesg.format(backend))
+
+    source = _kernel_source(exprs, variables, params, name)
+    namespace = {'numpy': np}
+    exec(compile(source, '<{}>'.format(name), 'exec'), namespace)
+
+    # pure Python kernels are already vectorized over any trailing dimensions
+    if numba is None:
+        return namespace[name], namespace[name]
+    else:
+        namespace[name] = jit(namespace[name])
+        namespace[name + '_batch'] = jit(namespace[name + '_batch'])
+        return namespace[name], namespace[name + '_batch']
@@ -2,6 +2,8 @@ import matplotlib.pyplot as plt
 import numpy as np
 import pandas as pd
 
+import kernels
+
 
 class Simulator(object):
     """Class for simulating the Pugh-Schaffer-Seabright model."""
@@ -60,60 +62,86 @@ class Simulator(object):
         self._initial_condition = initial_condition
 
     def _simulate_fixed_trajectory(self, initial_condition, T):
-        """Simulates a trajectory of fixed length."""
-        # set up the trajectory array
-        traj = np.empty((8, T))
-        traj[:, 0] = initial_condition
+        """Simulates a trajectory (or a batch of trajectories) of fixed length."""
+        if T < 1:
+            raise ValueError("The number of time steps 'T' must be at least 1.")
+
+        # time is the leading axis so each step is a contiguous block of memory
+        traj = np.empty((T,) + initial_condition.shape)
+
+        # whole simulation runs inside a single compiled function
+        if kernels.numba is not None and initial_condition.ndim == 1:
+            kernel, _ = self.family._compiled_system
+            _simulate_trajectory(kernel, initial_condition,
+                                 self.family._param_values, traj)
+            return traj.T
+
+        traj[0] = initial_condition
 
         # run the simulation
         for t in range(1, T):
-            current_shares = traj[:, t-1]
-            new_shares = self.F(current_shares)
-            traj[:, t] = new_shares
+            self.F(traj[t-1], out=traj[t])
 
-        return traj
+        # return a view with time as the trailing axis
+        return np.moveaxis(traj, 0, -1)
 
     def _simulate_variable_trajectory(self, initial_condition, rtol):
         """Simulates a trajectory of variable length."""
-        # set up the trajectory array
-        traj = initial_condition.reshape((8, 1))
+        # set up the trajectory array (capacity is doubled as needed)
+        traj = np.empty((8, 64))
+        traj[:, 0] = initial_condition
+        n = 1
 
         # initialize delta
         delta = np.ones(8)
 
         # run the simulation
         while np.any(np.greater(delta, rtol)):
-            current_shares = traj[:, -1]
-            new_shares = self.F(current_shares)
-            delta = np.abs(new_shares - current_shares)
+            if n == traj.shape[1]:
+                traj = np.hstack((traj, np.empty_like(traj)))
 
             # update the trajectory
-            traj = np.hstack((traj, new_shares[:, np.newaxis]))
+            self.F(traj[:, n-1], out=traj[:, n])
+            delta = np.abs(traj[:, n] - traj[:, n-1])
+            n += 1
 
-        return traj
+        return traj[:, :n]
 
-    def _trajectory_to_dataframe(self, trajectory):
-        """Converts a numpy array into a suitably formated pandas.DataFrame."""
-        idx = pd.Index(range(trajectory.shape[1]), name='Time')
-        headers = ['Adult Male Genotypes', 'Female Offspring Genotypes']
-        genotypes = range(4)
-        cols = pd.MultiIndex.from_product([headers, genotypes])
-        df = pd.DataFrame(trajectory.T, index=idx, columns=cols)
-        return df
+    def F(self, X, out=None):
+        """
+        Equation of motion for population allele shares.
+
+        Parameters
+        ----------
+        X : numpy.ndarray (shape=(8,) or shape=(8, N))
+            Current values of the endogenous variables. Passing a 2D array
+            evaluates the equation of motion for all N columns at once.
+        out : numpy.ndarray (default=None)
+            Optional array (same shape as X) in which to store the result.
+
+        Returns
+        -------
+        out : numpy.ndarray
+            Next period values of the endogenous variables (same shape as X).
 
-    def F(self, X):
-        """Equation of motion for population allele shares."""
-        out = self.family._numeric_system(X[:4], X[4:],
-                                          *self.family.params.values())
-        return out.ravel()
+        """
+        kernel, batch_kernel = self.family._compiled_system
+        if out is None:
+            out = np.empty(X.shape)
+        if X.ndim == 1:
+            kernel(X, self.family._param_values, out)
+        else:
+            batch_kernel(X, self.family._param_values, out)
+        return out
 
     def F_jacobian(self, X):
         """Jacobian for equation of motion."""
-        jac = self.family._numeric_jacobian(X[:4], X[4:],
-                                            *self.family.params.values())
+        kernel, _ = self.family._compiled_jacobian
+        jac = np.empty((8, 8))
+        kernel(X, self.family._param_values, jac)
         return jac
 
-    def simulate(self, rtol=None, T=None):
+    def simulate(self, rtol=None, T=None, as_dataframe=False):
         """
         Simulates the model for either fixed of variable number of time steps.
 
@@ -124,11 +152,14 @@ class Simulator(object):
         rtol : float (default=None)
             Simulate the model until the relative difference between timesteps
             is sufficiently small.
+        as_dataframe : boolean (default=False)
+            Flag indicating whether to return the simulation as a hierarchical
+            pandas.DataFrame (see `to_dataframe`) instead of an array.
 
         Returns
         -------
-        df : pandas.DataFrame
-            Hierarchical dataframe representing a simulation of the model.
+        traj : numpy.ndarray (shape=(8, T)) or pandas.DataFrame
+            Array representing a simulation of the model.
 
         """
         if T is not None:
@@ -138,19 +169,86 @@ class Simulator(object):
         else:
             raise ValueError("One of 'T' or 'rtol' must be specified.")
 
-        df = self._trajectory_to_dataframe(traj)
+        if as_dataframe:
+            return to_dataframe(traj)
+        else:
+            return traj
 
-        return df
+    def simulate_batch(self, initial_conditions, T):
+        """
+        Simulates the model for a fixed number of time steps starting from
+        several initial conditions at once.
+
+        Parameters
+        ----------
+        initial_conditions : numpy.ndarray (shape=(8, N))
+            Array whose columns are the N initial conditions.
+        T : int
+            The number of time steps to simulate.
+
+        Returns
+        -------
+        traj : numpy.ndarray (shape=(8, N, T))
+            Array of simulated trajectories, one for each initial condition.
+
+        Notes
+        -----
+        The equation of motion is evaluated for all N trajectories in a single
+        vectorized call per time step which is much faster than looping over
+        the initial conditions and calling `simulate` for each.
+
+        """
+        initial_conditions = np.asarray(initial_conditions, dtype=float)
+        if initial_conditions.ndim != 2 or initial_conditions.shape[0] != 8:
+            mesg = "The initial_conditions array must have shape (8, N)."
+            raise ValueError(mesg)
+        traj = self._simulate_fixed_trajectory(initial_conditions, T)
+        return traj
 
 
 class Distribution(object):
 
+    __dataframe = None
+
     __distribution = None
 
     def __init__(self, family, simulation):
+        """
+        Create an instance of the Distribution class.
+
+        Parameters
+        ----------
+        family : families.family
+            Instance of the families.Family class defining a family unit.
+        simulation : numpy.ndarray or pandas.DataFrame
+            Simulation of the model as returned by `Simulator.simulate`.
+
+        """
         self.family = family
         self.simulation = simulation
 
+    @property
+    def _dataframe(self):
+        """
+        Hierarchical DataFrame representing the simulation.
+
+        :getter: Return the current DataFrame.
+        :type: pandas.DataFrame
+
+        Notes
+        -----
+        Only the time series properties need the simulation as a DataFrame,
+        so a simulation passed as a numpy.ndarray is only converted on first
+        access.
+
+        """
+        if self.__dataframe is None:
+            if isinstance(self.simulation, np.ndarray):
+                self.__dataframe = to_dataframe(self.simulation)
+            else:
+                self.__dataframe = self.simulation
+        return self.__dataframe
+
     @property
     def distribution(self):
         """
@@ -164,6 +262,25 @@ class Distribution(object):
             self.__distribution = self.compute_distribution(self.simulation)
         return self.__distribution
 
+    @property
+    def simulation(self):
+        """
+        Simulation of the model.
+
+        :getter: Return the current simulation.
+        :setter: Set a new simulation.
+        :type: numpy.ndarray or pandas.DataFrame
+
+        """
+        return self._simulation
+
+    @simulation.setter
+    def simulation(self, value):
+        """Set a new simulation."""
+        self._simulation = value
+        self.__dataframe = None
+        self.__distribution = None
+
     @property
     def alpha_natural_selection_pressure(self):
         """
@@ -396,7 +513,7 @@ class Distribution(object):
         :type: pandas.Series
 
         """
-        A_female_offspring = self.simulation['Female Offspring Genotypes'][[0, 2]]
+        A_female_offspring = self._dataframe['Female Offspring Genotypes'][[0, 2]]
         return A_female_offspring.sum(axis=1)
 
     @property
@@ -409,7 +526,7 @@ class Distribution(object):
         :type: pandas.Series
 
         """
-        A_male_adults = self.simulation['Adult Male Genotypes'][[0, 2]]
+        A_male_adults = self._dataframe['Adult Male Genotypes'][[0, 2]]
         return A_male_adults.sum(axis=1)
 
     @property
@@ -457,7 +574,7 @@ class Distribution(object):
         :type: pandas.Series
 
         """
-        a_female_offspring = self.simulation['Female Offspring Genotypes'][[1, 3]]
+        a_female_offspring = self._dataframe['Female Offspring Genotypes'][[1, 3]]
         return a_female_offspring.sum(axis=1)
 
     @property
@@ -470,7 +587,7 @@ class Distribution(object):
         :type: pandas.Series
 
         """
-        a_male_adults = self.simulation['Adult Male Genotypes'][[1, 3]]
+        a_male_adults = self._dataframe['Adult Male Genotypes'][[1, 3]]
         return a_male_adults.sum(axis=1)
 
     @property
@@ -507,7 +624,7 @@ class Distribution(object):
         number of female offspring.
 
         """
-        female_offspring = self.simulation['Female Offspring Genotypes'][[0, 1, 2, 3]]
+        female_offspring = self._dataframe['Female Offspring Genotypes'][[0, 1, 2, 3]]
         return female_offspring.sum(axis=1)
 
     @property
@@ -536,7 +653,7 @@ class Distribution(object):
         :type: pandas.Series
 
         """
-        G_female_offspring = self.simulation['Female Offspring Genotypes'][[0, 1]]
+        G_female_offspring = self._dataframe['Female Offspring Genotypes'][[0, 1]]
         return G_female_offspring.sum(axis=1)
 
     @property
@@ -549,7 +666,7 @@ class Distribution(object):
         :type: pandas.Series
 
         """
-        G_male_adults = self.simulation['Adult Male Genotypes'][[0, 1]]
+        G_male_adults = self._dataframe['Adult Male Genotypes'][[0, 1]]
         return G_male_adults.sum(axis=1)
 
     @property
@@ -597,7 +714,7 @@ class Distribution(object):
         :type: pandas.Series
 
         """
-        g_female_offspring = self.simulation['Female Offspring Genotypes'][[2, 3]]
+        g_female_offspring = self._dataframe['Female Offspring Genotypes'][[2, 3]]
         return g_female_offspring.sum(axis=1)
 
     @property
@@ -610,7 +727,7 @@ class Distribution(object):
         :type: pandas.Series
 
         """
-        g_male_adults = self.simulation['Adult Male Genotypes'][[2, 3]]
+        g_male_adults = self._dataframe['Adult Male Genotypes'][[2, 3]]
         return g_male_adults.sum(axis=1)
 
     @property
@@ -654,7 +771,7 @@ class Distribution(object):
         :type: pandas.Series
 
         """
-        return self.simulation['Female Offspring Genotypes'][0]
+        return self._dataframe['Female Offspring Genotypes'][0]
 
     @property
     def number_Ga_female_adults(self):
@@ -678,7 +795,7 @@ class Distribution(object):
         :type: pandas.Series
 
         """
-        return self.simulation['Female Offspring Genotypes'][1]
+        return self._dataframe['Female Offspring Genotypes'][1]
 
     @property
     def number_gA_female_adults(self):
@@ -702,7 +819,7 @@ class Distribution(object):
         :type: pandas.Series
 
         """
-        return self.simulation['Female Offspring Genotypes'][2]
+        return self._dataframe['Female Offspring Genotypes'][2]
 
     @property
     def number_ga_female_adults(self):
@@ -726,7 +843,7 @@ class Distribution(object):
         :type: pandas.Series
 
         """
-        return self.simulation['Female Offspring Genotypes'][3]
+        return self._dataframe['Female Offspring Genotypes'][3]
 
     @property
     def number_GA_male_adults(self):
@@ -737,7 +854,7 @@ class Distribution(object):
         :type: pandas.Series
 
         """
-        return self.simulation['Adult Male Genotypes'][0]
+        return self._dataframe['Adult Male Genotypes'][0]
 
     @property
     def number_Ga_male_adults(self):
@@ -748,7 +865,7 @@ class Distribution(object):
         :type: pandas.Series
 
         """
-        return self.simulation['Adult Male Genotypes'][1]
+        return self._dataframe['Adult Male Genotypes'][1]
 
     @property
     def number_gA_male_adults(self):
@@ -759,7 +876,7 @@ class Distribution(object):
         :type: pandas.Series
 
         """
-        return self.simulation['Adult Male Genotypes'][2]
+        return self._dataframe['Adult Male Genotypes'][2]
 
     @property
     def number_ga_male_adults(self):
@@ -770,7 +887,7 @@ class Distribution(object):
         :type: pandas.Series
 
         """
-        return self.simulation['Adult Male Genotypes'][3]
+        return self._dataframe['Adult Male Genotypes'][3]
 
     @property
     def share_A_female_adults(self):
@@ -1004,22 +1121,24 @@ class Distribution(object):
         """
         return self.number_ga_female_offspring / self.number_female_offspring
 
-    def compute_distribution(self, dataframe):
+    def compute_distribution(self, simulation):
         """Compute distributions of various family configurations."""
-        family_distributions = []
-        for config in self.family.configurations:
-            self.family.male_genotype = config[0]
-            self.family.female_genotypes = config[1:]
-
-            tmp_dist = dataframe.apply(self.family.compute_size, axis=1,
-                                       raw=True)
-            family_distributions.append(tmp_dist)
+        if isinstance(simulation, np.ndarray):
+            trajectory = simulation
+            index = pd.Index(range(trajectory.shape[1]), name='Time')
+        else:
+            trajectory = simulation.values.T
+            index = simulation.index
+        configurations = self.family.configurations
+        sizes = np.empty((len(configurations), trajectory.shape[1]))
+        for i, config in enumerate(configurations):
+            sizes[i] = self.family.compute_size_batch(trajectory, config[0],
+                                                      config[1:])
 
         # want to return a properly formated pandas df
-        df = pd.concat(family_distributions, axis=1)
-        df.columns = self.family.configurations
+        df = pd.DataFrame(sizes, index=configurations, columns=index)
 
-        return df.T
+        return df
 
     def plot_adult_female_genotypes(self, axis, share=False):
         """Plot the timepaths for individual adult female genotypes."""
@@ -1308,6 +1427,86 @@ class Distribution(object):
         return axis
 
 
+def to_dataframe(trajectory):
+    """
+    Converts a simulated trajectory into a suitably formated pandas.DataFrame.
+
+    Parameters
+    ----------
+    trajectory : numpy.ndarray (shape=(8, T))
+        Array representing a simulation of the model.
+
+    Returns
+    -------
+    df : pandas.DataFrame
+        Hierarchical dataframe representing a simulation of the model.
+
+    """
+    idx = pd.Index(range(trajectory.shape[1]), name='Time')
+    headers = ['Adult Male Genotypes', 'Female Offspring Genotypes']
+    genotypes = range(4)
+    cols = pd.MultiIndex.from_product([headers, genotypes])
+    df = pd.DataFrame(trajectory.T, index=idx, columns=cols)
+    return df
+
+
+@kernels.jit
+def _simulate_trajectory(kernel, initial_condition, params, traj):
+    """Simulate a trajectory of fixed length, storing it in traj (T, 8)."""
+    traj[0] = initial_condition
+    for t in range(1, traj.shape[0]):
+        kernel(traj[t-1], params, traj[t])
+
+
+@kernels.jit(parallel=True)
+def _simulate_many(kernel, initial_conditions, params, T):
+    """Simulate many trajectories of fixed length in parallel."""
+    N = initial_conditions.shape[1]
+    traj = np.empty((N, T, 8))
+    for i in kernels.prange(N):
+        _simulate_trajectory(kernel, initial_conditions[:, i], params, traj[i])
+    return traj
+
+
+def simulate_many(simulator, initial_conditions, T):
+    """
+    Simulate the model for a fixed number of time steps starting from many
+    initial conditions, using all available cores.
+
+    Parameters
+    ----------
+    simulator : simulators.Simulator
+    initial_conditions : numpy.ndarray (shape=(8, N))
+        Array whose columns are the N initial conditions.
+    T : int
+        The number of time steps to simulate.
+
+    Returns
+    -------
+    traj : numpy.ndarray (shape=(8, N, T))
+        Array of simulated trajectories, one for each initial condition.
+
+    Notes
+    -----
+    If Numba is not available this falls back to `Simulator.simulate_batch`.
+
+    """
+    if kernels.numba is None:
+        return simulator.simulate_batch(initial_conditions, T)
+
+    initial_conditions = np.asarray(initial_conditions, dtype=float)
+    if initial_conditions.ndim != 2 or initial_conditions.shape[0] != 8:
+        mesg = "The initial_conditions array must have shape (8, N)."
+        raise ValueError(mesg)
+    if T < 1:
+        raise ValueError("The number of time steps 'T' must be at least 1.")
+
+    kernel, _ = simulator.family._compiled_system
+    traj = _simulate_many(kernel, initial_conditions,
+                          simulator.family._param_values, T)
+    return traj.transpose(2, 0, 1)
+
+
 def plot_selection_pressure(simulator, mGA0, T=None, rtol=None, **params):
     """Plot measures of selection pressure on the alpha and gamma genes."""
     # simulate the model
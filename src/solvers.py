@@ -2,17 +2,148 @@ import numpy as np
 from scipy import optimize
 import sympy as sym
 
+import kernels
+
+
+@kernels.jit
+def _impose_adding_up(X, residual, jac=None):
+    """
+    Replace the last male equation with the adding up constraint.
+
+    Parameters
+    ----------
+    X : numpy.ndarray (shape=(8,) or (8, N))
+        Endogenous variables.
+    residual : numpy.ndarray (shape=(8,) or (8, N))
+        Model residual evaluated at `X`, modified in place.
+    jac : numpy.ndarray (shape=(8, 8) or (8, 8, N), default=None)
+        Jacobian of the model residual evaluated at `X`, modified in place.
+
+    Notes
+    -----
+    The equation of motion for adult males conserves their total, so one of
+    the male equations is redundant and the Jacobian of the residual is
+    singular at every steady state. Replacing the last male equation by the
+    constraint that the male shares sum to one makes the system square and
+    non-singular.
+
+    """
+    residual[3] = X[0] + X[1] + X[2] + X[3] - 1
+    if jac is not None:
+        jac[3] = 0.0
+        jac[3, :4] = 1.0
+
+
+@kernels.jit
+def _take_step(X, step, alpha, out):
+    """
+    Take a damped Newton step that keeps all variables positive.
+
+    Parameters
+    ----------
+    X : numpy.ndarray (shape=(8,) or (8, N))
+        Current iterate.
+    step : numpy.ndarray (shape=(8,) or (8, N))
+        Full Newton step.
+    alpha : float
+        Step length.
+    out : numpy.ndarray (shape=(8,) or (8, N))
+        Array in which to store the new iterate.
+
+    """
+    # the residual is not defined when some variables are exactly zero, so
+    # variables that would become negative are shrunk towards zero instead
+    trial = X - alpha * step
+    out[:] = np.where(trial > 0, trial, (1 - 0.5 * alpha) * X)
+
+    # enforce the adding up constraint for males
+    out[:4] /= out[0] + out[1] + out[2] + out[3]
+
+
+@kernels.jit
+def newton(kernel, x0, params, tol, maxiter):
+    """
+    Damped Newton iteration for the steady state of the model.
+
+    Parameters
+    ----------
+    kernel : function
+        Compiled kernel jointly evaluating the residual and its Jacobian.
+    x0 : numpy.ndarray (shape=(8,))
+        Initial guess.
+    params : numpy.ndarray
+        Array of parameter values.
+    tol : float
+        Convergence tolerance for the maximum absolute residual.
+    maxiter : int
+        Maximum number of Newton iterations.
+
+    Returns
+    -------
+    x : numpy.ndarray (shape=(8,))
+        Final iterate.
+    residual : numpy.ndarray (shape=(8,))
+        Residual at the final iterate.
+    success : boolean
+        Whether or not the iteration converged.
+    nit : int
+        Number of Newton iterations performed.
+
+    """
+    x = x0.copy()
+    residual = np.empty(8)
+    jac = np.empty((8, 8))
+    trial = np.empty(8)
+    trial_residual = np.empty(8)
+    trial_jac = np.empty((8, 8))
+
+    kernel(x, params, residual, jac)
+    _impose_adding_up(x, residual, jac)
+
+    for nit in range(maxiter):
+        if np.max(np.abs(residual)) < tol:
+            return x, residual, True, nit
+
+        step = np.linalg.solve(jac, residual)
+
+        # backtrack until the sum of squared residuals decreases; if no step
+        # length does then x is a local minimum of the sum of squares that is
+        # not a root, and the full step is taken in order to escape it
+        obj = 0.5 * np.sum(residual**2)
+        alpha = 1.0
+        while True:
+            _take_step(x, step, alpha, trial)
+            kernel(trial, params, trial_residual, trial_jac)
+            _impose_adding_up(trial, trial_residual, trial_jac)
+            trial_obj = 0.5 * np.sum(trial_residual**2)
+            if trial_obj <= (1 - 1e-4 * alpha) * obj:
+                break
+            elif alpha < 1e-10:
+                _take_step(x, step, 1.0, trial)
+                kernel(trial, params, trial_residual, trial_jac)
+                _impose_adding_up(trial, trial_residual, trial_jac)
+                break
+            alpha *= 0.5
+
+        x[:] = trial
+        residual[:] = trial_residual
+        jac[:, :] = trial_jac
+
+    return x, residual, np.max(np.abs(residual)) < tol, maxiter
+
 
 class Solver(object):
     """Base class for steady state solvers."""
 
-    __numeric_jacobian = None
+    __compiled_residual = None
+
+    __compiled_residual_and_jacobian = None
 
-    __numeric_residual = None
+    __compiled_residual_jacobian = None
 
-    _modules = [{'ImmutableMatrix': np.array}, "numpy"]
+    __param_names = None
 
-    def __init__(self, family):
+    def __init__(self, family, backend='numba'):
         """
         Create an instance of the Solver class.
 
@@ -20,39 +151,81 @@ class Solver(object):
         ----------
         family : families.family
             Instance of the families.Family class defining a family unit.
+        backend : str (default='numba')
+            Backend used to compile the residual and its Jacobian. See
+            `kernels.compile_kernel` for details.
 
         """
         self.family = family
+        self.backend = backend
+        self._residual_buffer = np.empty(8)
+        self._residual_jacobian_buffer = np.empty((8, 8))
+        self._last_X = None
+        self._equilibria = {}
 
     @property
-    def _numeric_residual_jacobian(self):
+    def _compiled_residual(self):
         """
-        Vectorized function for numerically evaluating the Jacobian matrix.
+        Compiled kernel for numerically evaluating the model residual.
 
-        :getter: Return the current function.
+        :getter: Return the current kernel.
         :type: function
 
         """
-        if self.__numeric_jacobian is None:
-            self.__numeric_jacobian = sym.lambdify(self.family._symbolic_args,
-                                                   self._symbolic_residual_jacobian,
-                                                   self._modules)
-        return self.__numeric_jacobian
+        self._check_param_names()
+        if self.__compiled_residual is None:
+            kernel, _ = kernels.compile_kernel([self._symbolic_residual],
+                                               self.family._symbolic_vars,
+                                               self.family._symbolic_params,
+                                               'residual',
+                                               self.backend)
+            self.__compiled_residual = kernel
+        return self.__compiled_residual
 
     @property
-    def _numeric_residual(self):
+    def _compiled_residual_and_jacobian(self):
         """
-        Vectorized function for numerically evaluating the model residual.
+        Compiled kernel for jointly evaluating the model residual and its
+        Jacobian matrix.
+
+        :getter: Return the current pair of (scalar, batch) kernels.
+        :type: tuple
+
+        Notes
+        -----
+        The residual and its Jacobian share most of their intermediate
+        terms; compiling them together means these are only computed once.
 
-        :getter: Return the current function.
+        """
+        self._check_param_names()
+        if self.__compiled_residual_and_jacobian is None:
+            exprs = [self._symbolic_residual, self._symbolic_residual_jacobian]
+            kernel = kernels.compile_kernel(exprs,
+                                            self.family._symbolic_vars,
+                                            self.family._symbolic_params,
+                                            'residual_and_jacobian',
+                                            self.backend)
+            self.__compiled_residual_and_jacobian = kernel
+        return self.__compiled_residual_and_jacobian
+
+    @property
+    def _compiled_residual_jacobian(self):
+        """
+        Compiled kernel for numerically evaluating the Jacobian matrix.
+
+        :getter: Return the current kernel.
         :type: function
 
         """
-        if self.__numeric_residual is None:
-            self.__numeric_residual = sym.lambdify(self.family._symbolic_args,
-                                                   self._symbolic_residual,
-                                                   self._modules)
-        return self.__numeric_residual
+        self._check_param_names()
+        if self.__compiled_residual_jacobian is None:
+            kernel, _ = kernels.compile_kernel([self._symbolic_residual_jacobian],
+                                               self.family._symbolic_vars,
+                                               self.family._symbolic_params,
+                                               'residual_jacobian',
+                                               self.backend)
+            self.__compiled_residual_jacobian = kernel
+        return self.__compiled_residual_jacobian
 
     @property
     def _symbolic_residual(self):
@@ -95,7 +268,37 @@ class Solver(object):
         """Set a new initial guess."""
         self._initial_guess = value
 
-    def residual_jacobian(self, X):
+    def _check_param_names(self):
+        """Clear the compiled kernels if the model parameters have changed."""
+        if self.__param_names != self.family._param_names:
+            self._clear_cache()
+            self.__param_names = self.family._param_names
+
+    def _clear_cache(self):
+        """Clear all cached values."""
+        self.__compiled_residual = None
+        self.__compiled_residual_and_jacobian = None
+        self.__compiled_residual_jacobian = None
+        self._last_X = None
+
+    def _residual_and_jacobian(self, X):
+        """
+        Evaluate the model residual and its Jacobian matrix.
+
+        Results are stored in buffers that are reused between calls and are
+        cached so that repeated calls with the same `X` (and parameters) are
+        free.
+
+        """
+        key = np.hstack((X, self.family._param_values))
+        if self._last_X is None or not np.array_equal(key, self._last_X):
+            kernel, _ = self._compiled_residual_and_jacobian
+            kernel(X, self.family._param_values, self._residual_buffer,
+                   self._residual_jacobian_buffer)
+            self._last_X = key
+        return self._residual_buffer, self._residual_jacobian_buffer
+
+    def residual_jacobian(self, X, out=None):
         """
         Jacobian matrix of partial derivatives for the system of non-linear
         equations defining the steady state.
@@ -103,6 +306,8 @@ class Solver(object):
         Parameters
         ----------
         X : numpy.ndarray
+        out : numpy.ndarray (default=None)
+            Optional array of shape (8, 8) in which to store the result.
 
         Returns
         -------
@@ -110,16 +315,20 @@ class Solver(object):
             Jacobian matrix of partial derivatives.
 
         """
-        jac = self._numeric_residual_jacobian(X[:4], X[4:], **self.family.params)
-        return jac
+        if out is None:
+            out = np.empty((8, 8))
+        self._compiled_residual_jacobian(X, self.family._param_values, out)
+        return out
 
-    def residual(self, X):
+    def residual(self, X, out=None):
         """
         System of non-linear equations defining the model steady state.
 
         Parameters
         ----------
         X : numpy.ndarray
+        out : numpy.ndarray (default=None)
+            Optional array of shape (8,) in which to store the result.
 
         Returns
         -------
@@ -128,8 +337,10 @@ class Solver(object):
             variables and parameters.
 
         """
-        residual = self._numeric_residual(X[:4], X[4:], **self.family.params)
-        return residual.ravel()
+        if out is None:
+            out = np.empty(8)
+        self._compiled_residual(X, self.family._param_values, out)
+        return out
 
     def solve(self, *args, **kwargs):
         raise NotImplementedError
@@ -163,19 +374,50 @@ class LeastSquaresSolver(Solver):
         return {'type': 'eq', 'fun': cons}
 
     def _objective(self, X):
-        obj = 0.5 * np.sum(self.residual(X)**2)
+        residual, _ = self._residual_and_jacobian(X)
+        obj = 0.5 * np.sum(residual**2)
         return obj
 
     def _objective_jacobian(self, X):
-        jac = np.sum(self.residual(X) * self.residual_jacobian(X), axis=0)
+        residual, residual_jac = self._residual_and_jacobian(X)
+        jac = np.sum(residual[:, np.newaxis] * residual_jac, axis=0)
         return jac
 
-    def solve(self, **kwargs):
+    def _known_equilibrium(self, X, basin_tol):
+        """Return a cached equilibrium whose image under F is close to F(X)."""
+        key = tuple(sorted(self.family.params.items()))
+        equilibria = self._equilibria.get(key, [])
+        if equilibria:
+            # don't use the buffers behind the cache in _residual_and_jacobian
+            F_X = self.residual(X) + X
+            for result in equilibria:
+                # the image of an equilibrium under F is the equilibrium itself
+                if np.linalg.norm(F_X - result.x) < basin_tol:
+                    return result
+        return None
+
+    def _store_equilibrium(self, result, basin_tol):
+        """Store a new equilibrium unless it is within basin_tol of a known one."""
+        key = tuple(sorted(self.family.params.items()))
+        equilibria = self._equilibria.setdefault(key, [])
+        for known in equilibria:
+            if np.linalg.norm(result.x - known.x) < basin_tol:
+                return
+        equilibria.append(result)
+
+    def solve(self, basin_tol=None, **kwargs):
         """
         Solve the system of non-linear equations describing the equilibrium.
 
         Parameters
         ----------
+        basin_tol : float (default=None)
+            If not None, then before solving the image of the initial guess
+            under the equation of motion is compared to the equilibria found
+            by previous calls with the same parameters; if it is within
+            `basin_tol` of one of them, the cached result is returned.
+            Otherwise a successful result is added to the known equilibria
+            unless it is within `basin_tol` of one of them.
         kwargs : dict
             Dictionary of optional solver parameters.
 
@@ -184,6 +426,11 @@ class LeastSquaresSolver(Solver):
         result :
 
         """
+        if basin_tol is not None:
+            result = self._known_equilibrium(self.initial_guess, basin_tol)
+            if result is not None:
+                return result
+
         result = optimize.minimize(self._objective,
                                    x0=self.initial_guess,
                                    jac=self._objective_jacobian,
@@ -192,34 +439,321 @@ class LeastSquaresSolver(Solver):
                                    constraints=self._constraints,
                                    **kwargs
                                    )
+
+        if basin_tol is not None and result.success:
+            self._store_equilibrium(result, basin_tol)
+
         return result
 
 
 class RootFinder(Solver):
     """Solve a system of non-linear equations by root finding."""
 
-    def solve(self, method='hybr', with_jacobian=False, **kwargs):
+    def _constrained_residual(self, X):
+        """Model residual with the last male equation replaced."""
+        residual = self.residual(X)
+        _impose_adding_up(X, residual)
+        return residual
+
+    def _constrained_residual_and_jacobian(self, X):
+        """Model residual and Jacobian with the last male equation replaced."""
+        residual, jac = np.empty(8), np.empty((8, 8))
+        kernel, _ = self._compiled_residual_and_jacobian
+        kernel(X, self.family._param_values, residual, jac)
+        _impose_adding_up(X, residual, jac)
+        return residual, jac
+
+    def solve(self, method='hybr', with_jacobian=True, **kwargs):
         """
         Solve the system of non-linear equations describing the equilibrium.
 
         Parameters
         ----------
-        method : str
-        with_jacobian : boolean (default=False)
+        method : str (default='hybr')
+        with_jacobian : boolean (default=True)
 
         Returns
         -------
-        result :
+        result : scipy.optimize.OptimizeResult
+            The attribute `fun` is the full model residual evaluated at `x`.
+
+        Notes
+        -----
+        The last male equation is replaced by the constraint that the male
+        shares sum to one (see `_impose_adding_up`).
 
         """
         if with_jacobian:
-            kwargs['jac'] = self.jacobian
+            kwargs['jac'] = True
+            fun = self._constrained_residual_and_jacobian
         else:
             kwargs['jac'] = False
+            fun = self._constrained_residual
 
-        result = optimize.root(self.residual,
+        result = optimize.root(fun,
                                x0=self.initial_guess,
                                method=method,
                                **kwargs
                                )
+
+        result.fun = self.residual(result.x)
+        return result
+
+    def solve_batch(self, initial_guesses, tol=1e-10, maxiter=100):
+        """
+        Solve the system of non-linear equations describing the equilibrium
+        starting from many initial guesses at once.
+
+        Parameters
+        ----------
+        initial_guesses : numpy.ndarray (shape=(N, 8))
+            Array whose rows are the N initial guesses.
+        tol : float (default=1e-10)
+            Convergence tolerance for the maximum absolute residual.
+        maxiter : int (default=100)
+            Maximum number of Newton iterations.
+
+        Returns
+        -------
+        result : scipy.optimize.OptimizeResult
+            The attributes `x` and `fun` have shape (N, 8) and `success` is a
+            boolean array of shape (N,).
+
+        Notes
+        -----
+        Takes simultaneous Newton steps for all N initial guesses; each step
+        solves N independent 8x8 linear systems in a single call to
+        `numpy.linalg.solve`. As in `NewtonSolver`, the last male equation is
+        replaced by the adding up constraint and full steps are taken with
+        `_take_step`, which keeps all iterates strictly positive. Singular
+        linear systems fall back to the pseudo-inverse for the affected
+        guesses only.
+
+        """
+        X = np.array(initial_guesses, dtype=float).T.copy()
+        N = X.shape[1]
+        residual = np.empty((8, N))
+        jac = np.empty((8, 8, N))
+        _, batch_kernel = self._compiled_residual_and_jacobian
+        params = self.family._param_values
+
+        failed = np.zeros(N, dtype=bool)
+        for nit in range(maxiter + 1):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                batch_kernel(X, params, residual, jac)
+            _impose_adding_up(X, residual, jac)
+
+            success = np.max(np.abs(residual), axis=0) < tol
+            failed |= ~(np.isfinite(residual).all(axis=0) &
+                        np.isfinite(jac).all(axis=(0, 1)))
+            active = ~(success | failed)
+            if not active.any() or nit == maxiter:
+                break
+
+            # Newton step for every guess that has yet to converge
+            A = jac[..., active].transpose(2, 0, 1)
+            b = residual[:, active].T[..., np.newaxis]
+            try:
+                step = np.linalg.solve(A, b)[..., 0]
+            except np.linalg.LinAlgError:
+                step = np.empty(b.shape[:2])
+                for n in range(A.shape[0]):
+                    try:
+                        step[n] = np.linalg.solve(A[n], b[n, :, 0])
+                    except np.linalg.LinAlgError:
+                        step[n] = np.linalg.pinv(A[n]).dot(b[n, :, 0])
+
+            trial = np.empty(step.shape[::-1])
+            _take_step(X[:, active], step.T, 1.0, trial)
+            X[:, active] = trial
+
+        result = optimize.OptimizeResult(x=X.T, fun=residual.T,
+                                         success=success, nit=nit)
+        return result
+
+
+class ReducedRootFinder(Solver):
+    """
+    Solve a system of non-linear equations by root finding on the simplex.
+
+    The share of adult males with the last genotype is eliminated using the
+    adding up constraint, which leaves a square system of seven equations in
+    seven unknowns that can be solved without any constraints.
+
+    """
+
+    __compiled_reduced_residual_and_jacobian = None
+
+    @property
+    def _compiled_reduced_residual_and_jacobian(self):
+        """
+        Compiled kernel for jointly evaluating the reduced residual and its
+        Jacobian matrix.
+
+        :getter: Return the current pair of (scalar, batch) kernels.
+        :type: tuple
+
+        """
+        self._check_param_names()
+        if self.__compiled_reduced_residual_and_jacobian is None:
+            exprs = [self._symbolic_reduced_residual,
+                     self._symbolic_reduced_residual_jacobian]
+            kernel = kernels.compile_kernel(exprs,
+                                            self._symbolic_reduced_vars,
+                                            self.family._symbolic_params,
+                                            'reduced_residual_and_jacobian',
+                                            self.backend)
+            self.__compiled_reduced_residual_and_jacobian = kernel
+        return self.__compiled_reduced_residual_and_jacobian
+
+    @property
+    def _symbolic_reduced_residual(self):
+        """
+        Symbolic representation of the reduced model residual.
+
+        :getter: Return the reduced model residual.
+        :type: sympy.Matrix
+
+        Notes
+        -----
+        The last male equation is redundant once the adding up constraint has
+        been substituted and is dropped (see `_impose_adding_up`).
+
+        """
+        men = self.family._symbolic_vars[:4]
+        substitution = {men[3]: 1 - men[0] - men[1] - men[2]}
+        resid = self._symbolic_residual.xreplace(substitution)
+        resid.row_del(3)
+        return resid
+
+    @property
+    def _symbolic_reduced_residual_jacobian(self):
+        """
+        Symbolic representation of the Jacobian matrix of the reduced model
+        residual.
+
+        :getter: Return Jacobian matrix of partial derivatives.
+        :type: sympy.Matrix
+
+        """
+        return self._symbolic_reduced_residual.jacobian(self._symbolic_reduced_vars)
+
+    @property
+    def _symbolic_reduced_vars(self):
+        """
+        List of symbolic endogenous variables of the reduced system.
+
+        :getter: Return list of symbolic endogenous variables.
+        :type: list
+
+        """
+        symbolic_vars = self.family._symbolic_vars
+        return symbolic_vars[:3] + symbolic_vars[4:]
+
+    def _clear_cache(self):
+        """Clear all cached values."""
+        super(ReducedRootFinder, self)._clear_cache()
+        self.__compiled_reduced_residual_and_jacobian = None
+
+    @staticmethod
+    def _expand(x):
+        """Map a point of the reduced system back to all eight variables."""
+        X = np.empty(8)
+        X[:3] = x[:3]
+        X[3] = 1 - x[0] - x[1] - x[2]
+        X[4:] = x[3:]
+        return X
+
+    @staticmethod
+    def _reduce(X):
+        """Drop the share of adult males with the last genotype."""
+        return np.hstack((X[:3], X[4:]))
+
+    def _reduced_residual_and_jacobian(self, x):
+        """Evaluate the reduced residual and its Jacobian matrix."""
+        residual = np.empty(7)
+        jac = np.empty((7, 7))
+        kernel, _ = self._compiled_reduced_residual_and_jacobian
+        kernel(x, self.family._param_values, residual, jac)
+        return residual, jac
+
+    def solve(self, method='hybr', with_jacobian=True, **kwargs):
+        """
+        Solve the system of non-linear equations describing the equilibrium.
+
+        Parameters
+        ----------
+        method : str (default='hybr')
+        with_jacobian : boolean (default=True)
+
+        Returns
+        -------
+        result : scipy.optimize.OptimizeResult
+            The attribute `x` holds all eight endogenous variables and `fun`
+            is the full model residual evaluated at `x`.
+
+        """
+        if with_jacobian:
+            kwargs['jac'] = True
+            fun = self._reduced_residual_and_jacobian
+        else:
+            kwargs['jac'] = False
+            fun = lambda x: self._reduced_residual_and_jacobian(x)[0]
+
+        x0 = self._reduce(np.asarray(self.initial_guess, dtype=float))
+        result = optimize.root(fun,
+                               x0=x0,
+                               method=method,
+                               **kwargs
+                               )
+
+        result.x = self._expand(result.x)
+        result.fun = self.residual(result.x)
+        return result
+
+
+class NewtonSolver(Solver):
+    """Solve a system of non-linear equations using a damped Newton method."""
+
+    def solve(self, tol=1e-10, maxiter=100):
+        """
+        Solve the system of non-linear equations describing the equilibrium.
+
+        Parameters
+        ----------
+        tol : float (default=1e-10)
+            Convergence tolerance for the maximum absolute residual.
+        maxiter : int (default=100)
+            Maximum number of Newton iterations.
+
+        Returns
+        -------
+        result : scipy.optimize.OptimizeResult
+
+        Notes
+        -----
+        The whole iteration (including a backtracking line search) runs inside
+        a single compiled function which avoids the overhead of calling back
+        into Python at every evaluation of the residual. The last male
+        equation is replaced by the adding up constraint and steps are damped
+        by `_take_step` to keep all iterates strictly positive.
+
+        """
+        if self.backend != 'numba':
+            mesg = "NewtonSolver requires the 'numba' backend."
+            raise ValueError(mesg)
+
+        kernel, _ = self._compiled_residual_and_jacobian
+        x0 = np.array(self.initial_guess, dtype=float)
+        try:
+            x, fun, success, nit = newton(kernel, x0,
+                                          self.family._param_values,
+                                          tol, maxiter)
+            message = 'Converged.' if success else 'Failed to converge.'
+        except np.linalg.LinAlgError:
+            x, fun, success, nit = x0, self.residual(x0), False, 0
+            message = 'Singular Jacobian matrix.'
+
+        result = optimize.OptimizeResult(x=x, fun=fun, success=success,
+                                         nit=nit, message=message)
         return result
@@ -124,14 +124,13 @@ class PughSchafferSeabrightCase(unittest.TestCase):
                                                  SGA=pugh_schaffer_seabright.SGA,
                                                  Sga=pugh_schaffer_seabright.Sga)
 
-    def test_numeric_jacobian_shape(self):
-        """Validate the shape of the numeric Jacobian matrix."""
+    def test_compiled_jacobian_finite(self):
+        """Validate that the compiled Jacobian kernel fills every entry."""
         X = np.repeat(0.25, 8)
-        tmp_jacobian = self.family._numeric_jacobian(X[:4], X[4:],
-                                                     *self.family.params.values())
-        actual_shape = tmp_jacobian.shape
-        expected_shape = (8, 8)
-        self.assertEquals(actual_shape, expected_shape)
+        tmp_jacobian = np.full((8, 8), np.nan)
+        kernel, _ = self.family._compiled_jacobian
+        kernel(X, self.family._param_values, tmp_jacobian)
+        self.assertTrue(np.isfinite(tmp_jacobian).all())
 
     def test_symbolic_jacobian_shape(self):
         """Validate the shape of the symbolic Jacobian matrix."""
@@ -149,7 +148,7 @@ class PughSchafferSeabrightCase(unittest.TestCase):
         # simulate the trajectory of the model
         simulation = simulators.Simulator(self.family)
         simulation.initial_condition = 0.5
-        sim = simulation.simulate(rtol=1e-12)
+        sim = simulation.simulate(rtol=1e-12, as_dataframe=True)
 
         # equilibrium number of female children is propto payoff
         selfish_females = sim['Female Offspring Genotypes'][[1, 3]]
@@ -168,7 +167,7 @@ class PughSchafferSeabrightCase(unittest.TestCase):
         # simulate the trajectory of the model
         simulation = simulators.Simulator(self.family)
         simulation.initial_condition = 0.5
-        sim = simulation.simulate(rtol=1e-12)
+        sim = simulation.simulate(rtol=1e-12, as_dataframe=True)
 
         # equilibrium number of female children is propto payoff
         altruistic_females = sim['Female Offspring Genotypes'][[0, 2]]
@@ -245,3 +244,40 @@ class WrightBergstromCase(unittest.TestCase):
                     expected_size = men[i] * genotype_match_probs
                     actual_size = self.family.compute_size(tmp_X)
                     np.testing.assert_almost_equal(expected_size, actual_size)
+
+    def test_compute_size_batch(self):
+        """Testing vectorized computation of family size along a trajectory."""
+        T = 10
+        prng = np.random.RandomState(42)
+        men = prng.dirichlet((1, 1, 1, 1), size=T).T
+        girls = prng.uniform(1.0, 5.0, (4, T))
+        trajectory = np.vstack((men, girls))
+
+        for config in self.family.configurations:
+            actual_sizes = self.family.compute_size_batch(trajectory, config[0],
+                                                          config[1:])
+            self.assertEqual(actual_sizes.shape, (T,))
+            for t in range(T):
+                expected_size = self.family.compute_size(trajectory[:, t])
+                np.testing.assert_almost_equal(expected_size, actual_sizes[t])
+
+    def test_reordered_params(self):
+        """Testing that the order of the params dictionary is irrelevant."""
+        X = np.array([0.1, 0.2, 0.3, 0.4, 1.0, 2.0, 3.0, 4.0])
+        self.family.male_genotype = 0
+        self.family.female_genotypes = (1, 2)
+
+        kernel, _ = self.family._compiled_system
+        expected_system = np.empty(8)
+        kernel(X, self.family._param_values, expected_system)
+        expected_size = self.family.compute_size(X)
+
+        reordered_params = dict(reversed(list(self.family.params.items())))
+        self.family.params = reordered_params
+
+        kernel, _ = self.family._compiled_system
+        actual_system = np.empty(8)
+        kernel(X, self.family._param_values, actual_system)
+        np.testing.assert_almost_equal(expected_system, actual_system)
+        np.testing.assert_almost_equal(expected_size,
+                                       self.family.compute_size(X))
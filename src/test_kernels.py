@@ -0,0 +1,69 @@
+"""
+Testing suite for the kernels.py module.
+
+"""
+from functools import partial
+import unittest
+
+import numpy as np
+import sympy as sym
+
+import kernels
+
+assert_allclose = partial(np.testing.assert_allclose, atol=1e-12)
+
+# a simple system with a vector and a matrix valued output
+x, y = sym.symbols('x, y')
+a, b = sym.symbols('a, b')
+system = sym.Matrix([a * x * y + x**2, b * (x * y + x**2) / (x + y)])
+jacobian = system.jacobian([x, y])
+
+numeric_system = sym.lambdify((x, y, a, b), system, 'numpy')
+numeric_jacobian = sym.lambdify((x, y, a, b), jacobian, 'numpy')
+
+
+def test_compile_kernel():
+    """Test compiled kernels against the lambdified expressions."""
+    kernel, batch_kernel = kernels.compile_kernel([system, jacobian], [x, y],
+                                                  [a, b])
+    p = np.array([2.0, 3.0])
+
+    # evaluate at a single point
+    X = np.array([0.25, 0.75])
+    out0, out1 = np.empty(2), np.empty((2, 2))
+    kernel(X, p, out0, out1)
+    assert_allclose(out0, numeric_system(*X, *p).ravel())
+    assert_allclose(out1, numeric_jacobian(*X, *p))
+
+    # evaluate at a batch of points
+    X = np.random.RandomState(42).uniform(0.1, 1.0, (2, 5))
+    out0, out1 = np.empty((2, 5)), np.empty((2, 2, 5))
+    batch_kernel(X, p, out0, out1)
+    for n in range(5):
+        assert_allclose(out0[:, n],
+                        numeric_system(*X[:, n], *p).ravel())
+        assert_allclose(out1[..., n],
+                        numeric_jacobian(*X[:, n], *p))
+
+
+def test_compile_kernel_cython():
+    """Test kernels compiled with the cython backend."""
+    try:
+        import Cython
+    except ImportError:
+        raise unittest.SkipTest("Cython is not installed.")
+
+    kernel, batch_kernel = kernels.compile_kernel([system, jacobian], [x, y],
+                                                  [a, b], backend='cython')
+    p = np.array([2.0, 3.0])
+    X = np.array([0.25, 0.75])
+    out0, out1 = np.empty(2), np.empty((2, 2))
+    kernel(X, p, out0, out1)
+    assert_allclose(out0, numeric_system(*X, *p).ravel())
+    assert_allclose(out1, numeric_jacobian(*X, *p))
+
+
+def test_compile_kernel_invalid_backend():
+    """Test that an invalid backend raises a ValueError."""
+    with np.testing.assert_raises(ValueError):
+        kernels.compile_kernel([system], [x, y], [a, b], backend='invalid')
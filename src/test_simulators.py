@@ -12,6 +12,8 @@ methods.
 
 """
 import nose
+import numpy as np
+import pandas as pd
 
 import families
 import simulators
@@ -33,6 +35,10 @@ def test_simulate():
     with nose.tools.assert_raises(ValueError):
         simulator.simulate()
 
+    # trajectories must include at least the initial condition
+    with nose.tools.assert_raises(ValueError):
+        simulator.simulate(T=0)
+
 
 def test_plot_isolated_subpopulations_simulation():
     """Test return type for isolated subpopulations simulation plot."""
@@ -84,3 +90,73 @@ def test_plot_selection_pressure():
     out = simulators.plot_selection_pressure(simulator, mGA0=0.5, rtol=1e-12,
                                              **params)
     nose.tools.assert_is_instance(out, list)
+
+
+def test_simulate_batch():
+    """Test the simulate_batch method of the Simulator class."""
+    T = 25
+    mGA0 = [0.25, 0.5, 0.75]
+    initial_conditions = []
+    for tmp_mGA0 in mGA0:
+        simulator.initial_condition = tmp_mGA0
+        initial_conditions.append(simulator.initial_condition)
+    initial_conditions = np.column_stack(initial_conditions)
+
+    trajs = simulator.simulate_batch(initial_conditions, T)
+    nose.tools.assert_equal(trajs.shape, (8, len(mGA0), T))
+
+    # batched trajectories should match the individual simulations
+    for i, tmp_mGA0 in enumerate(mGA0):
+        simulator.initial_condition = tmp_mGA0
+        expected = simulator.simulate(T=T)
+        np.testing.assert_allclose(trajs[:, i, :], expected)
+
+    # initial conditions must be an array with shape (8, N)
+    with nose.tools.assert_raises(ValueError):
+        simulator.simulate_batch(initial_conditions[:4], T)
+
+
+def test_simulate_many():
+    """Test the simulate_many function against simulate_batch."""
+    T = 25
+    prng = np.random.RandomState(42)
+    initial_conditions = np.vstack((prng.dirichlet(np.ones(4), size=10).T,
+                                    prng.uniform(0, 10, (4, 10))))
+
+    trajs = simulators.simulate_many(simulator, initial_conditions, T)
+    expected = simulator.simulate_batch(initial_conditions, T)
+    nose.tools.assert_equal(trajs.shape, (8, 10, T))
+    np.testing.assert_allclose(trajs, expected)
+
+    # initial conditions must be an array with shape (8, N)
+    with nose.tools.assert_raises(ValueError):
+        simulators.simulate_many(simulator, initial_conditions[:4], T)
+
+    # trajectories must include at least the initial condition
+    with nose.tools.assert_raises(ValueError):
+        simulators.simulate_many(simulator, initial_conditions, 0)
+
+
+def test_to_dataframe():
+    """Test conversion of a simulation to a pandas.DataFrame."""
+    simulator.initial_condition = 0.5
+    traj = simulator.simulate(T=10)
+    df = simulators.to_dataframe(traj)
+    nose.tools.assert_equal(df.shape, (10, 8))
+    np.testing.assert_allclose(df['Adult Male Genotypes'].values, traj[:4].T)
+    np.testing.assert_allclose(simulator.simulate(T=10, as_dataframe=True).values,
+                               df.values)
+
+
+def test_distribution():
+    """Testing Distribution with array and DataFrame simulations."""
+    simulator.initial_condition = 0.5
+    simulation = simulator.simulate(T=10)
+    array_distribution = simulators.Distribution(family, simulation)
+    dataframe_distribution = simulators.Distribution(family,
+                                                     simulators.to_dataframe(simulation))
+
+    pd.testing.assert_frame_equal(array_distribution.distribution,
+                                  dataframe_distribution.distribution)
+    pd.testing.assert_series_equal(array_distribution.number_A_female_adults,
+                                   dataframe_distribution.number_A_female_adults)
@@ -0,0 +1,179 @@
+"""
+Testing suite for the solvers.py module.
+
+"""
+import nose
+import numpy as np
+
+import families
+import solvers
+import wright_bergstrom
+
+# create an instance of the Family class
+params = {'c': 5.0, 'e': 0.5, 'PiaA': 7.0, 'PiAA': 5.0, 'Piaa': 3.0,
+          'PiAa': 2.0}
+family = families.OneMaleTwoFemales(dict(params),
+                                    SGA=wright_bergstrom.SGA,
+                                    Sga=wright_bergstrom.Sga)
+
+# random initial guesses with male shares on the simplex
+prng = np.random.RandomState(42)
+initial_males = prng.dirichlet(np.ones(4), size=10)
+initial_guesses = np.hstack((initial_males, initial_males))
+
+# compiling kernels is expensive, so share solvers between tests
+least_squares_solver = solvers.LeastSquaresSolver(family)
+root_finder = solvers.RootFinder(family)
+
+
+def check_equilibrium(solver, X, tol=1e-8):
+    """Check that X is a steady state of the model."""
+    nose.tools.assert_less(np.max(np.abs(solver.residual(X))), tol)
+    nose.tools.assert_almost_equal(np.sum(X[:4]), 1.0)
+    nose.tools.assert_true(np.all(X > -tol))
+
+
+def test_residual_and_jacobian():
+    """Testing the fused residual and Jacobian against separate kernels."""
+    solver = root_finder
+    X = initial_guesses[0]
+    residual, jac = solver._residual_and_jacobian(X)
+    np.testing.assert_almost_equal(residual, solver.residual(X))
+    np.testing.assert_almost_equal(jac, solver.residual_jacobian(X))
+
+    # cached values must be recomputed when the parameters change
+    family.params['e'] = 0.75
+    try:
+        residual, jac = solver._residual_and_jacobian(X)
+        np.testing.assert_almost_equal(residual, solver.residual(X))
+        np.testing.assert_almost_equal(jac, solver.residual_jacobian(X))
+    finally:
+        family.params['e'] = params['e']
+
+
+def test_solve_batch():
+    """Testing that batched root finding agrees with one guess at a time."""
+    solver = root_finder
+    result = solver.solve_batch(initial_guesses)
+    nose.tools.assert_equal(result.x.shape, initial_guesses.shape)
+    nose.tools.assert_true(result.success.all())
+
+    for i, initial_guess in enumerate(initial_guesses):
+        check_equilibrium(solver, result.x[i])
+        single_result = solver.solve_batch(initial_guess[np.newaxis])
+        np.testing.assert_almost_equal(result.x[i], single_result.x[0])
+
+        # scalar root finder started at the equilibrium stays there
+        solver.initial_guess = result.x[i]
+        np.testing.assert_almost_equal(result.x[i], solver.solve().x)
+
+
+def test_newton_solver():
+    """Testing the compiled damped Newton solver."""
+    solver = solvers.NewtonSolver(family)
+    for initial_guess in initial_guesses:
+        solver.initial_guess = initial_guess
+        result = solver.solve()
+        nose.tools.assert_true(result.success)
+        check_equilibrium(solver, result.x)
+
+    # Newton iteration is only available with the numba backend
+    solver = solvers.NewtonSolver(family, backend='cython')
+    solver.initial_guess = initial_guesses[0]
+    with nose.tools.assert_raises(ValueError):
+        solver.solve()
+
+
+def test_root_finder():
+    """Testing the root finder with and without an analytic Jacobian."""
+    solver = root_finder
+    for initial_guess in initial_guesses:
+        solver.initial_guess = initial_guess
+        for with_jacobian in [True, False]:
+            result = solver.solve(with_jacobian=with_jacobian)
+            nose.tools.assert_true(result.success)
+            check_equilibrium(solver, result.x)
+
+    # fun is the model residual even if the solver stops before converging
+    solver.initial_guess = initial_guesses[0]
+    result = solver.solve(options={'maxfev': 2})
+    np.testing.assert_almost_equal(result.fun, solver.residual(result.x))
+
+
+def test_reduced_root_finder():
+    """Testing the root finder for the reduced system."""
+    solver = solvers.ReducedRootFinder(family)
+    for initial_guess in initial_guesses:
+        solver.initial_guess = initial_guess
+        result = solver.solve(tol=1e-12)
+        nose.tools.assert_true(result.success)
+        nose.tools.assert_equal(result.x.shape, (8,))
+        np.testing.assert_almost_equal(result.fun, solver.residual(result.x))
+        check_equilibrium(solver, result.x)
+
+
+def test_reordered_params():
+    """Testing that the residual does not depend on the order of params."""
+    X = np.array([0.1, 0.2, 0.3, 0.4, 1.0, 2.0, 3.0, 4.0])
+    solver = root_finder
+    expected_residual = solver.residual(X)
+    expected_jac = solver.residual_jacobian(X)
+
+    family.params = dict(reversed(list(params.items())))
+    try:
+        np.testing.assert_almost_equal(expected_residual, solver.residual(X))
+        np.testing.assert_almost_equal(expected_jac,
+                                       solver.residual_jacobian(X))
+    finally:
+        family.params = dict(params)
+
+
+def test_missing_params():
+    """Testing that removing a parameter raises a KeyError."""
+    X = np.array([0.1, 0.2, 0.3, 0.4, 1.0, 2.0, 3.0, 4.0])
+    solver = solvers.RootFinder(family)
+    solver.residual(X)
+
+    family.params = dict(params)
+    del family.params['e']
+    try:
+        with nose.tools.assert_raises(KeyError):
+            solver.residual(X)
+    finally:
+        family.params = dict(params)
+
+
+def test_known_equilibrium():
+    """Testing that reusing a known equilibrium keeps the objective valid."""
+    solver = least_squares_solver
+    solver._equilibria = {}
+    solver.initial_guess = initial_guesses[0]
+    result = solver.solve(basin_tol=1e3)
+    X = solver._last_X[:8].copy()
+
+    # second guess is within the (huge) basin of the first equilibrium
+    solver.initial_guess = initial_guesses[1]
+    nose.tools.assert_is(solver.solve(basin_tol=1e3), result)
+
+    expected_objective = 0.5 * np.sum(solver.residual(X)**2)
+    np.testing.assert_almost_equal(expected_objective, solver._objective(X))
+
+
+def test_store_equilibrium():
+    """Testing that equivalent equilibria are only stored once."""
+    solver = least_squares_solver
+    solver._equilibria = {}
+    for initial_guess in initial_guesses:
+        solver.initial_guess = initial_guess
+        solver.solve(basin_tol=1e-3, tol=1e-14)
+
+    equilibria = solver._equilibria[tuple(sorted(params.items()))]
+    for i, equilibrium in enumerate(equilibria):
+        for other in equilibria[i + 1:]:
+            nose.tools.assert_greater(np.linalg.norm(equilibrium.x - other.x),
+                                      1e-3)
+
+    # without a basin tolerance results are not stored
+    solver._equilibria = {}
+    solver.solve()
+    nose.tools.assert_equal(solver._equilibria, {})